@@ -1,3 +1,5 @@
+import os
+import sys
 import json
 import random
 import time
@@ -6,6 +8,11 @@ from collections import defaultdict
 
 from locust import HttpUser, task, between, LoadTestShape
 
+# Shared helpers live in the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from script import fill_template_ids
+from scaling import users_for_bucket
+
 ###############################################################################
 # STEP 1: LOAD JSON FILE WITH TRAFFIC PATTERN
 ###############################################################################
@@ -13,6 +20,9 @@ from locust import HttpUser, task, between, LoadTestShape
 # Load JSON file
 JSON_FILE = "traffic_pattern.json"
 
+# Think time between a user's tasks, in seconds
+WAIT_TIME_RANGE = (1, 3)
+
 with open(JSON_FILE, "r") as f:
     TRAFFIC_DATA = json.load(f)
 
@@ -55,8 +65,9 @@ class CustomLoadShape(LoadTestShape):
         bucket_data = time_buckets.get(current_bucket, {})
         total_requests = sum(url_data["count"] for url_data in bucket_data.get("url_list", {}).values())
 
-        # Define user count based on request volume
-        target_users = max(total_requests // 10, 1)  # Scaling factor
+        # Enough users to send the bucket's request count at one request per task;
+        # volume is scaled when traffic_pattern.json is generated (see STEP 4)
+        target_users = users_for_bucket(total_requests, sum(WAIT_TIME_RANGE) / 2)
 
         # Define spawn rate (how fast users are added)
         spawn_rate = max(target_users // 10, 1)
@@ -72,7 +83,7 @@ class WebsiteUser(HttpUser):
     """
     Simulates user requests dynamically based on the current 5-minute bucket.
     """
-    wait_time = between(1, 3)  # Random wait time
+    wait_time = between(*WAIT_TIME_RANGE)  # Random wait time
 
     def on_start(self):
         """
@@ -101,17 +112,18 @@ class WebsiteUser(HttpUser):
         # Get request distribution for this time bucket
         bucket_data = time_buckets.get(current_bucket, {}).get("url_list", {})
 
-        # Build a weighted request list
+        # Build a weighted request list; "other" is the folded long tail, not a path
         request_choices = []
         for url, url_data in bucket_data.items():
-            request_choices.extend([url] * url_data["count"])
+            if url != "other":
+                request_choices.extend([url] * url_data["count"])
 
         if not request_choices:
             return  # No URLs to request
 
-        # Pick a URL based on frequency
+        # Pick a URL based on frequency and fill in recorded ids
         url_to_request = random.choice(request_choices)
-        self.client.get(url_to_request)
+        self.client.get(fill_template_ids(url_to_request, bucket_data[url_to_request]))
 
 
 ###############################################################################
@@ -121,7 +133,9 @@ class WebsiteUser(HttpUser):
 # """
 # How to run:
 # 1. Save this script as `locustfile.py`
-# 2. Ensure `traffic_pattern.json` is in the same directory
+# 2. Generate `traffic_pattern.json` in the same directory at the load you want,
+#    from the repo root, e.g. the 19:00 peak at 3x:
+#    `python scaling.py --factor 3 --window 19:00-19:30 --seed 0 --output locust-script/traffic_pattern.json`
 # 3. Run: `locust -f locustfile.py`
 # 4. Open `http://localhost:8089` in your browser to start the test.
 # """
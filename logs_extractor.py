@@ -14,7 +14,7 @@ def parse_elb_log(line):
         r'(?P<client_ip>\d+\.\d+\.\d+\.\d+):(?P<client_port>\d+) '
         r'(?P<target_ip>\d+\.\d+\.\d+\.\d+):(?P<target_port>\d+) '
         r'(?P<request_time>[\d\.]+) (?P<target_time>[\d\.]+) (?P<response_time>[\d\.]+) '
-        r'(?P<http_status>\d+) (?P<elb_status>\d+) (?P<sent_bytes>\d+) (?P<received_bytes>\d+) '
+        r'(?P<http_status>\d+) (?P<elb_status>\d+) (?P<received_bytes>\d+) (?P<sent_bytes>\d+) '
         r'"(?P<request>[^"]+)" "(?P<user_agent>[^"]*)" '
         r'(?P<ssl_cipher>\S+) (?P<ssl_protocol>\S+)'
     )
@@ -0,0 +1,273 @@
+import json
+import math
+import random
+import logging
+import argparse
+from datetime import datetime, timedelta
+from collections import defaultdict
+
+from script import convert_utc_to_ist, get_time_interval, url_template, url_ids, INTERVAL_SECONDS
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+def slot_in_window(time_slot, window):
+    """Check whether a "HH:MM - HH:MM" slot starts inside a (start, end) "HH:MM" window."""
+    if not window:
+        return True
+    start, end = window
+    return start <= time_slot.split(" - ")[0] < end
+
+def users_for_bucket(request_count, mean_wait):
+    """
+    Locust users needed to send request_count requests in one interval when every user
+    waits mean_wait seconds between tasks. Response time is not counted, so the load
+    undershoots slightly when the target is slow.
+    """
+    return max(math.ceil(request_count * mean_wait / INTERVAL_SECONDS), 1)
+
+def apportion(counts, factor, rng):
+    """
+    Scales a {stratum: count} mapping by factor while keeping the overall total exact.
+
+    Each stratum gets the floor of its scaled count; the remaining units go to the
+    largest fractional remainders (largest remainder method), with ties broken by rng
+    so the result is deterministic under a seed but not biased by dict order.
+    """
+    scaled = {key: count * factor for key, count in counts.items()}
+    target_total = round(sum(scaled.values()))
+    allocation = {key: int(value) for key, value in scaled.items()}
+
+    leftover = target_total - sum(allocation.values())
+    ranked = sorted(scaled, key=lambda key: (scaled[key] - allocation[key], rng.random()), reverse=True)
+    for key in ranked[:leftover]:
+        allocation[key] += 1
+    return allocation
+
+def scale_bytes(byte_stats, ratio):
+    """Scales volume figures (count, total, mb_per_s); per-request size percentiles do not change with load."""
+    scaled = {}
+    for name, stats in byte_stats.items():
+        scaled[name] = dict(stats, total=round(stats["total"] * ratio))
+        if "count" in stats:
+            scaled[name]["count"] = round(stats["count"] * ratio)
+        if "mb_per_s" in stats:
+            scaled[name]["mb_per_s"] = stats["mb_per_s"] * ratio
+    return scaled
+
+def merge_bytes(merged, byte_stats):
+    """
+    Adds the volume figures of byte_stats into merged. Percentiles cannot be combined,
+    so merged keeps those of whichever entry was merged first (the busiest).
+    """
+    for name, stats in byte_stats.items():
+        if name not in merged:
+            merged[name] = dict(stats)
+            continue
+        merged[name]["total"] += stats["total"]
+        if "count" in stats:
+            merged[name]["count"] = merged[name].get("count", 0) + stats["count"]
+        if "mb_per_s" in stats:
+            merged[name]["mb_per_s"] = merged[name].get("mb_per_s", 0) + stats["mb_per_s"]
+    return merged
+
+def scale_traffic_pattern(traffic_data, factor, seed=0, window=None):
+    """
+    Scales a processed_logs_IST.json style traffic pattern to factor times its volume.
+
+    Every bucket is apportioned independently over (URL template, status code) strata,
+    so the URL and status mix of each bucket survives the scaling. Bucket latency
+    averages and byte percentiles are carried over unchanged; byte totals and
+    MB/s scale with the request count.
+
+    Args:
+        traffic_data: {time_slot: {"target_avg_time", "response_avg_time", "url_list"}}
+        factor: Target multiple of the recorded volume (0.25, 3, ...)
+        seed: Seed for tie-breaking between equally sized strata
+        window: Optional ("HH:MM", "HH:MM") range of slots to keep, e.g. the 19:00 peak
+
+    Returns:
+        dict: A new traffic pattern in the same format
+    """
+    if factor <= 0:
+        raise ValueError(f"Load multiplier must be positive, got {factor}")
+
+    rng = random.Random(seed)
+    scaled_output = {}
+
+    for time_slot in sorted(traffic_data):
+        if not slot_in_window(time_slot, window):
+            continue
+        data = traffic_data[time_slot]
+
+        strata = defaultdict(int)
+        template_counts = defaultdict(int)
+        template_bytes = defaultdict(dict)
+        template_method_bytes = defaultdict(lambda: defaultdict(dict))
+        template_ids = defaultdict(lambda: defaultdict(int))
+        for url, url_data in sorted(data.get("url_list", {}).items(), key=lambda item: item[1]["count"], reverse=True):
+            template = url_template(url)
+            template_counts[template] += url_data["count"]
+            # Raw paths sharing a template add up their byte volume
+            merge_bytes(template_bytes[template], url_data.get("bytes", {}))
+            for method, byte_stats in url_data.get("bytes_by_method", {}).items():
+                merge_bytes(template_method_bytes[template][method], byte_stats)
+            for status, count in url_data["status_codes"].items():
+                strata[(template, status)] += count
+            # Recorded ids are a replay distribution, so they are merged but not scaled
+            for id_value, count in url_data.get("ids", {}).items():
+                template_ids[template][id_value] += count
+            if url != template and url_ids(url):
+                template_ids[template][url_ids(url)] += url_data["count"]
+
+        url_list = {}
+        for (url, status), count in apportion(strata, factor, rng).items():
+            if count == 0:
+                continue
+            url_entry = url_list.setdefault(url, {"count": 0, "status_codes": {}})
+            url_entry["count"] += count
+            url_entry["status_codes"][status] = count
+
+        for url, url_entry in url_list.items():
+            ratio = url_entry["count"] / template_counts[url]
+            if template_bytes[url]:
+                url_entry["bytes"] = scale_bytes(template_bytes[url], ratio)
+            if template_method_bytes[url]:
+                url_entry["bytes_by_method"] = {method: scale_bytes(byte_stats, ratio)
+                                                for method, byte_stats in template_method_bytes[url].items()}
+            if template_ids[url]:
+                url_entry["ids"] = dict(template_ids[url])
+
+        scaled_output[time_slot] = {
+            "target_avg_time": data.get("target_avg_time", 0),
+            "response_avg_time": data.get("response_avg_time", 0),
+            "url_list": url_list
+        }
+        if "bytes" in data:
+            recorded_total = sum(template_counts.values())
+            scaled_total = sum(url_entry["count"] for url_entry in url_list.values())
+            scaled_output[time_slot]["bytes"] = scale_bytes(data["bytes"], scaled_total / recorded_total if recorded_total else 0)
+
+    return scaled_output
+
+def request_bucket(log_data):
+    utc_time = datetime.strptime(log_data["timestamp"], TIMESTAMP_FORMAT)
+    return get_time_interval(convert_utc_to_ist(utc_time))
+
+def jitter_timestamp(timestamp, jitter_seconds, rng):
+    """Shifts a timestamp by up to +/- jitter_seconds without leaving its 5-minute bucket."""
+    utc_time = datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+    # IST is offset by 5:30 so UTC and IST 5-minute boundaries line up
+    bucket_start = utc_time.replace(minute=(utc_time.minute // 5) * 5, second=0, microsecond=0)
+    bucket_end = bucket_start + timedelta(seconds=INTERVAL_SECONDS) - timedelta(microseconds=1)
+
+    shifted = utc_time + timedelta(seconds=rng.uniform(-jitter_seconds, jitter_seconds))
+    shifted = min(max(shifted, bucket_start), bucket_end)
+    return shifted.strftime(TIMESTAMP_FORMAT)
+
+def scale_timeline(requests, factor, seed=0, window=None, jitter_seconds=30):
+    """
+    Scales a per-request timeline (filtered_logs.json from logs_extractor.py) to factor times its volume.
+
+    Requests are stratified by (time bucket, URL template). Below 1x each stratum keeps
+    its apportioned share, sampled without replacement. Above 1x every original request
+    is kept and the extra volume is made of clones with jittered timestamps. Each entry is
+    tagged with a "session" key (client_ip#clone) so a timeline replayer can give every
+    clone its own login; the locustfiles replay the bucketed pattern instead and spread
+    their users over the available credentials.
+
+    Args:
+        requests: List of parsed log entries with at least "timestamp", "url" and "client_ip"
+        factor: Target multiple of the recorded volume
+        seed: Seed for sampling, clone selection and jitter
+        window: Optional ("HH:MM", "HH:MM") IST range of buckets to keep
+        jitter_seconds: Maximum timestamp shift applied to clones
+
+    Returns:
+        list: Scaled requests sorted by timestamp
+    """
+    if factor <= 0:
+        raise ValueError(f"Load multiplier must be positive, got {factor}")
+
+    rng = random.Random(seed)
+    strata = defaultdict(list)
+    for log_data in requests:
+        time_slot = request_bucket(log_data)
+        if slot_in_window(time_slot, window):
+            strata[(time_slot, url_template(log_data["url"]))].append(log_data)
+
+    strata_keys = sorted(strata)
+    allocation = apportion({key: len(strata[key]) for key in strata_keys}, factor, rng)
+
+    scaled_requests = []
+    for key in strata_keys:
+        members = strata[key]
+        target = allocation[key]
+
+        if target <= len(members):
+            chosen = rng.sample(members, target)
+            scaled_requests.extend(dict(log_data, session=f"{log_data['client_ip']}#0") for log_data in chosen)
+            continue
+
+        # Full copies first, then a sample without replacement for the remainder
+        copies, remainder = divmod(target, len(members))
+        selections = [(log_data, clone) for clone in range(copies) for log_data in members]
+        selections.extend((log_data, copies) for log_data in rng.sample(members, remainder))
+
+        for log_data, clone in selections:
+            entry = dict(log_data, session=f"{log_data['client_ip']}#{clone}")
+            if clone > 0:
+                entry["timestamp"] = jitter_timestamp(log_data["timestamp"], jitter_seconds, rng)
+            scaled_requests.append(entry)
+
+    scaled_requests.sort(key=lambda log_data: log_data["timestamp"])
+    return scaled_requests
+
+def parse_window(value):
+    """
+    Parses an IST window such as "19:00-19:30" (or "9:00-9:30") into zero-padded ("HH:MM", "HH:MM").
+
+    The end is exclusive; "24:00" is accepted as end of day so the 23:55 slot can be selected.
+    """
+    try:
+        start, end = value.split("-")
+        start = datetime.strptime(start.strip(), "%H:%M").strftime("%H:%M")
+        end = "24:00" if end.strip() == "24:00" else datetime.strptime(end.strip(), "%H:%M").strftime("%H:%M")
+    except ValueError:
+        raise ValueError(f'Invalid load window "{value}", expected "HH:MM-HH:MM"') from None
+    if start >= end:
+        raise ValueError(f'Invalid load window "{value}", start must be before end')
+    return start, end
+
+def window_argument(value):
+    try:
+        return parse_window(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scale a recorded traffic pattern or request timeline.")
+    parser.add_argument("--factor", type=float, required=True, help="Target multiple of the recorded volume")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--window", type=window_argument, help='IST range of buckets to keep, e.g. "19:00-19:30"')
+    parser.add_argument("--timeline", action="store_true", help="Input is a per-request timeline instead of a traffic pattern")
+    parser.add_argument("--input", default="processed_logs_IST.json")
+    parser.add_argument("--output", default="scaled_traffic_pattern.json")
+    args = parser.parse_args()
+
+    with open(args.input, "r") as f:
+        input_data = json.load(f)
+
+    if args.timeline:
+        output_data = scale_timeline(input_data, args.factor, seed=args.seed, window=args.window)
+        logging.info(f"Scaled {len(input_data)} requests to {len(output_data)} at {args.factor}x")
+    else:
+        output_data = scale_traffic_pattern(input_data, args.factor, seed=args.seed, window=args.window)
+        total = sum(url_data["count"] for data in output_data.values() for url_data in data["url_list"].values())
+        logging.info(f"Scaled {len(output_data)} buckets to {total} requests at {args.factor}x")
+
+    with open(args.output, "w") as json_file:
+        json.dump(output_data, json_file, indent=4)
+
+    logging.info(f"Scaled traffic saved to {args.output}")
@@ -1,25 +1,67 @@
 import os
 import re
 import json
+import random
 import logging
 from datetime import datetime, timedelta
 from collections import defaultdict
 from urllib.parse import urlparse
 
+from sketches import HeavyHitters
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
 # Time slots in IST with 5-minute intervals
 time_intervals = {f"{hour:02d}:{minute:02d} - {hour:02d}:{minute+5:02d}": []
                   for hour in range(24) for minute in range(0, 60, 5)}
 
+# Per-interval top-K sizes; everything past these is folded into "other"
+TOP_K_URLS = 64
+TOP_K_CLIENT_IPS = 32
+TOP_K_USER_AGENTS = 16
+# Concrete ids kept per URL template, so replay hits ids that exist
+TOP_K_IDS = 16
+
+# Length of one time slot, shared by the aggregator, scaling and replay
+INTERVAL_SECONDS = 5 * 60
+
+# Methods that get their own size histograms; anything else (scanner junk) is "OTHER"
+HTTP_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+ID_SEGMENT = re.compile(r"(?<=/)\d+(?=/|$)")
+
+def url_template(url):
+    """Collapse numeric path segments into {id} so /team/team/42 and /team/team/7 share an entry."""
+    return ID_SEGMENT.sub("{id}", url)
+
+def url_ids(url):
+    """The numeric segments url_template collapses, joined with "/" (e.g. "3/7"), or None."""
+    return "/".join(ID_SEGMENT.findall(url)) or None
+
+def fill_template_ids(url, url_data, rng=random):
+    """
+    Replaces the {id} placeholders of a template with recorded ids, drawn by frequency
+    from url_data["ids"]. Falls back to 1-100 for patterns recorded without ids.
+    """
+    if "{id}" not in url:
+        return url
+    ids = url_data.get("ids")
+    if ids:
+        chosen = rng.choices(list(ids), weights=list(ids.values()))[0].split("/")
+    else:
+        chosen = [str(rng.randint(1, 100)) for _ in range(url.count("{id}"))]
+    for id_value in chosen:
+        url = url.replace("{id}", id_value, 1)
+    return url
+
 def parse_elb_log(line):
     log_pattern = re.compile(
         r'(?P<protocol>\S+) (?P<timestamp>\S+) (?P<elb>\S+) '
         r'(?P<client_ip>\d+\.\d+\.\d+\.\d+):(?P<client_port>\d+) '
         r'(?P<target_ip>\d+\.\d+\.\d+\.\d+):(?P<target_port>\d+) '
         r'(?P<request_time>[\d\.]+) (?P<target_time>[\d\.]+) (?P<response_time>[\d\.]+) '
-        r'(?P<http_status>\d+) (?P<elb_status>\d+) (?P<sent_bytes>\d+) (?P<received_bytes>\d+) '
-        r'"(?P<request>[^"]+)"'
+        r'(?P<http_status>\d+) (?P<elb_status>\d+) (?P<received_bytes>\d+) (?P<sent_bytes>\d+) '
+        r'"(?P<request>[^"]+)"(?: "(?P<user_agent>[^"]*)")?'
     )
     
     match = log_pattern.match(line)
@@ -28,10 +70,12 @@ def parse_elb_log(line):
         request_parts = data["request"].split(" ")
         data["method"] = request_parts[0] if len(request_parts) > 1 else ""
         parsed_url = urlparse(request_parts[1]) if len(request_parts) > 1 else ""
-        data["url"] = parsed_url.path.rstrip("/")  # Normalize
+        data["url"] = parsed_url.path.rstrip("/") if parsed_url else ""  # Normalize
         data["http_version"] = request_parts[2] if len(request_parts) > 2 else ""
         data["response_time"] = float(data["response_time"])
         data["http_status"] = int(data["http_status"])
+        data["received_bytes"] = int(data["received_bytes"])
+        data["sent_bytes"] = int(data["sent_bytes"])
         return data
     return None
 
@@ -44,13 +88,73 @@ def get_time_interval(ist_time):
     end_minute = start_minute + 5
     return f"{hour:02d}:{start_minute:02d} - {hour:02d}:{end_minute:02d}"
 
+def new_interval():
+    return {
+        "target_avg_time": [],
+        "response_avg_time": [],
+        "url_list": HeavyHitters(TOP_K_URLS, variants_k=TOP_K_IDS),
+        "client_ip": HeavyHitters(TOP_K_CLIENT_IPS),
+        "user_agent": HeavyHitters(TOP_K_USER_AGENTS)
+    }
+
+def request_sizes(log_data):
+    """
+    Size samples for one request: all-method totals plus a "<METHOD> <field>" copy, so GET
+    page loads and POST uploads to the same URL end up in separate histograms.
+    """
+    method = log_data["method"] if log_data["method"] in HTTP_METHODS else "OTHER"
+    sizes = {}
+    for name in ("received_bytes", "sent_bytes"):
+        sizes[name] = log_data[name]
+        sizes[f"{method} {name}"] = log_data[name]
+    return sizes
+
+def split_method_bytes(byte_stats):
+    """Splits {"received_bytes", "POST received_bytes", ...} into ({"received_bytes"}, {"POST": {"received_bytes"}})."""
+    overall = {}
+    by_method = defaultdict(dict)
+    for name, stats in byte_stats.items():
+        if " " in name:
+            method, field = name.split(" ", 1)
+            by_method[method][field] = stats
+        else:
+            overall[name] = stats
+    return overall, dict(by_method)
+
+def summarize_url_entry(entry):
+    url_entry = {key: value for key, value in entry.items() if key not in ("bytes", "variants")}
+    url_entry["bytes"], url_entry["bytes_by_method"] = split_method_bytes(entry["bytes"])
+    if entry.get("variants"):
+        url_entry["ids"] = entry["variants"]
+    return url_entry
+
+def summarize_url_list(url_hitters):
+    summary = url_hitters.summary()
+    url_list = {url: summarize_url_entry(entry) for url, entry in summary["top"].items()}
+    if summary["other"]["count"]:
+        url_list["other"] = summarize_url_entry(summary["other"])
+    interval_bytes, _ = split_method_bytes(summary["bytes"])
+    return url_list, interval_bytes, summary["error_bounds"]
+
+def summarize_bandwidth(interval_bytes):
+    # received_bytes is client -> ALB (uploads), sent_bytes is ALB -> client (pages, samples.zip)
+    return {name: dict(stats, mb_per_s=stats["total"] / INTERVAL_SECONDS / 1e6) for name, stats in interval_bytes.items()}
+
+def summarize_dimension(hitters):
+    summary = hitters.summary()
+    return {
+        "top": {key: {"count": entry["count"], "max_error": entry["max_error"]} for key, entry in summary["top"].items()},
+        "other": summary["other"]["count"],
+        "error_bounds": summary["error_bounds"]
+    }
+
 def process_logs(log_dir):
     if not os.path.exists(log_dir):
         logging.error(f"Log directory '{log_dir}' does not exist.")
         return None
     
     log_files = [f for f in os.listdir(log_dir) if f.endswith(".log")]
-    interval_data = defaultdict(lambda: {"target_avg_time": [], "response_avg_time": [], "url_list": defaultdict(lambda: {"count": 0, "status_codes": defaultdict(int)})})
+    interval_data = defaultdict(new_interval)
     
     for file in log_files:
         try:
@@ -63,18 +167,26 @@ def process_logs(log_dir):
                         time_slot = get_time_interval(ist_time)
                         interval_data[time_slot]["target_avg_time"].append(float(log_data["target_time"]))
                         interval_data[time_slot]["response_avg_time"].append(float(log_data["response_time"]))
-                        url_entry = interval_data[time_slot]["url_list"][log_data["url"]]
-                        url_entry["count"] += 1
-                        url_entry["status_codes"][log_data["http_status"]] += 1
+                        interval_data[time_slot]["url_list"].add(url_template(log_data["url"]), log_data["http_status"],
+                                                                 request_sizes(log_data), url_ids(log_data["url"]))
+                        interval_data[time_slot]["client_ip"].add(log_data["client_ip"])
+                        interval_data[time_slot]["user_agent"].add(log_data["user_agent"] or "-")
         except Exception as e:
             logging.error(f"Error reading file {file}: {e}")
     
     final_output = {}
     for slot, data in interval_data.items():
+        url_list, interval_bytes, url_error_bounds = summarize_url_list(data["url_list"])
         final_output[slot] = {
             "target_avg_time": sum(data["target_avg_time"]) / len(data["target_avg_time"]) if data["target_avg_time"] else 0,
             "response_avg_time": sum(data["response_avg_time"]) / len(data["response_avg_time"]) if data["response_avg_time"] else 0,
-            "url_list": {url: {"count": entry["count"], "status_codes": dict(entry["status_codes"])} for url, entry in data["url_list"].items()}
+            "bytes": summarize_bandwidth(interval_bytes),
+            "url_list": url_list,
+            "heavy_hitters": {
+                "url": {"error_bounds": url_error_bounds},
+                "client_ip": summarize_dimension(data["client_ip"]),
+                "user_agent": summarize_dimension(data["user_agent"])
+            }
         }
     
     with open("processed_logs_IST.json", "w") as json_file:
@@ -0,0 +1,230 @@
+import math
+import heapq
+import hashlib
+from array import array
+
+class CountMinSketch:
+    """
+    Fixed-size frequency estimator for high-cardinality keys.
+
+    Estimates never undercount; with probability 1 - delta they overcount by at
+    most epsilon * total, where epsilon = e / width and delta = e ** -depth.
+    """
+
+    def __init__(self, width=512, depth=4):
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self.table = [array("l", [0] * width) for _ in range(depth)]
+
+    def _indexes(self, key):
+        # Double hashing: one stable digest gives every row its own index
+        digest = hashlib.blake2b(str(key).encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def add(self, key, count=1):
+        self.total += count
+        for row, index in enumerate(self._indexes(key)):
+            self.table[row][index] += count
+
+    def estimate(self, key):
+        return min(self.table[row][index] for row, index in enumerate(self._indexes(key)))
+
+    def error_bound(self):
+        return {
+            "max_overcount": math.ceil(math.e / self.width * self.total),
+            "confidence": round(1 - math.exp(-self.depth), 4)
+        }
+
+class SizeHistogram:
+    """
+    Log-scale histogram of byte sizes with a fixed number of bins per doubling.
+
+    Memory is bounded by the size range (about 4 bins per power of two), and
+    percentiles are reported as bin upper bounds, so they overestimate by at most
+    about 19%.
+    """
+
+    BINS_PER_DOUBLING = 4
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self.bins = {}
+
+    def _bin(self, size):
+        return int(math.log2(size) * self.BINS_PER_DOUBLING) + 1 if size > 0 else 0
+
+    def _upper_bound(self, index):
+        return math.ceil(2 ** (index / self.BINS_PER_DOUBLING)) if index > 0 else 0
+
+    def add(self, size):
+        self.count += 1
+        self.total += size
+        self.min = size if self.min is None else min(self.min, size)
+        self.max = max(self.max, size)
+        index = self._bin(size)
+        self.bins[index] = self.bins.get(index, 0) + 1
+
+    def subtract(self, other):
+        """Returns the histogram of sizes in self that are not in other."""
+        remainder = SizeHistogram()
+        remainder.count = self.count - other.count
+        remainder.total = self.total - other.total
+        # min/max of self still bound the remainder
+        remainder.min = self.min
+        remainder.max = self.max
+        remainder.bins = {index: count - other.bins.get(index, 0) for index, count in self.bins.items()
+                          if count - other.bins.get(index, 0)}
+        return remainder
+
+    def percentile(self, q):
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen >= rank:
+                return min(self._upper_bound(index), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0,
+            "min": self.min or 0,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99)
+        }
+
+class SpaceSaving:
+    """
+    Top-K tracker that keeps at most k counters (Metwally et al. space-saving).
+
+    When a new key arrives and all counters are taken, it replaces the smallest
+    counter and inherits its count as error. A tracked key's true count therefore
+    lies in [count - error, count], and any untracked key occurred at most as
+    often as the smallest counter. Status codes, sizes and variants are only
+    recorded while a key is tracked, so they always cover count - error requests.
+
+    The smallest counter is found through a heap of (count, key) pairs that is
+    only refreshed lazily at eviction time, so eviction is O(log k) amortized.
+    """
+
+    def __init__(self, k, variants_k=0):
+        self.k = k
+        self.variants_k = variants_k
+        self.total = 0
+        self.counters = {}
+        self.heap = []
+
+    def _evict(self):
+        # Heap counts may be stale (counters only grow); re-push those until the top is current
+        while True:
+            count, key = heapq.heappop(self.heap)
+            if self.counters[key]["count"] == count:
+                return self.counters.pop(key)["count"]
+            heapq.heappush(self.heap, (self.counters[key]["count"], key))
+
+    def add(self, key, status=None, sizes=None, variant=None):
+        """
+        Counts one occurrence of key. variant is an optional sub-key (e.g. the concrete
+        ids behind a URL template) tracked in a nested top-variants_k summary.
+        """
+        self.total += 1
+        entry = self.counters.get(key)
+        if entry is None:
+            floor = self._evict() if len(self.counters) >= self.k else 0
+            entry = {"count": floor, "error": floor, "status_codes": {}, "sizes": {},
+                     "variants": SpaceSaving(self.variants_k) if self.variants_k else None}
+            self.counters[key] = entry
+            heapq.heappush(self.heap, (floor, key))
+
+        entry["count"] += 1
+        if status is not None:
+            entry["status_codes"][status] = entry["status_codes"].get(status, 0) + 1
+        for name, size in (sizes or {}).items():
+            entry["sizes"].setdefault(name, SizeHistogram()).add(size)
+        if variant is not None and entry["variants"] is not None:
+            entry["variants"].add(variant)
+
+    def top(self):
+        return sorted(self.counters.items(), key=lambda item: item[1]["count"], reverse=True)
+
+    def error_bound(self):
+        if len(self.counters) < self.k:
+            return {"max_untracked_count": 0}
+        return {"max_untracked_count": min(entry["count"] for entry in self.counters.values())}
+
+class HeavyHitters:
+    """
+    Bounded-memory frequency tracking for one dimension (URL, client IP, user agent).
+
+    Space-saving picks the heaviest keys; the count-min sketch tightens their upper
+    bounds. Everything that is not in the top K is folded into "other".
+    """
+
+    def __init__(self, k, width=512, depth=4, variants_k=0):
+        self.space_saving = SpaceSaving(k, variants_k)
+        self.count_min = CountMinSketch(width, depth)
+        self.status_codes = {}
+        self.sizes = {}
+
+    def add(self, key, status=None, sizes=None, variant=None):
+        """sizes is an optional {name: bytes} mapping, e.g. {"sent_bytes": 7106}."""
+        self.space_saving.add(key, status, sizes, variant)
+        self.count_min.add(key)
+        if status is not None:
+            self.status_codes[status] = self.status_codes.get(status, 0) + 1
+        for name, size in (sizes or {}).items():
+            self.sizes.setdefault(name, SizeHistogram()).add(size)
+
+    def summary(self):
+        """
+        Returns:
+            dict: {"top": {key: {"count", "max_error", "status_codes", "bytes", "variants"}}, "other": {...},
+                   "bytes": {...}, "error_bounds": {...}}
+
+        "count" is the guaranteed lower bound; the true count is at most count + max_error.
+        """
+        top = {}
+        other_status_codes = dict(self.status_codes)
+        other_sizes = dict(self.sizes)
+        for key, entry in self.space_saving.top():
+            guaranteed = entry["count"] - entry["error"]
+            upper_bound = min(entry["count"], self.count_min.estimate(key))
+            top[key] = {
+                "count": guaranteed,
+                "max_error": upper_bound - guaranteed,
+                "status_codes": dict(entry["status_codes"]),
+                "bytes": {name: histogram.summary() for name, histogram in entry["sizes"].items()},
+                "variants": {variant: variant_entry["count"] for variant, variant_entry in entry["variants"].top()}
+                            if entry["variants"] else {}
+            }
+            for status, count in entry["status_codes"].items():
+                other_status_codes[status] -= count
+            for name, histogram in entry["sizes"].items():
+                other_sizes[name] = other_sizes[name].subtract(histogram)
+
+        other_count = self.space_saving.total - sum(entry["count"] for entry in top.values())
+        return {
+            "top": top,
+            "other": {
+                "count": other_count,
+                "status_codes": {status: count for status, count in other_status_codes.items() if count},
+                "bytes": {name: histogram.summary() for name, histogram in other_sizes.items()}
+            },
+            "bytes": {name: histogram.summary() for name, histogram in self.sizes.items()},
+            "error_bounds": {
+                "total": self.space_saving.total,
+                "space_saving": self.space_saving.error_bound(),
+                "count_min": self.count_min.error_bound()
+            }
+        }
@@ -1,12 +1,17 @@
+import os
 import json
 import random
 import time
 import re
+import itertools
 import requests
 from datetime import datetime
 from collections import defaultdict
 
-from locust import HttpUser, task, between, LoadTestShape
+from locust import HttpUser, task, between, LoadTestShape, events
+
+from script import url_template, fill_template_ids, INTERVAL_SECONDS
+from scaling import scale_traffic_pattern, parse_window, users_for_bucket
 
 ###############################################################################
 # STEP 1: CONFIGURATION
@@ -18,6 +23,14 @@ TRAFFIC_FILE = "processed_logs_IST.json"
 with open(TRAFFIC_FILE, "r") as f:
     TRAFFIC_DATA = json.load(f)
 
+# Replay the recorded shape at a multiple of its volume, e.g.
+# LOAD_MULTIPLIER=3 LOAD_WINDOW=19:00-19:30 for the peak at 3x
+LOAD_MULTIPLIER = float(os.environ.get("LOAD_MULTIPLIER", "1"))
+LOAD_SEED = int(os.environ.get("LOAD_SEED", "0"))
+LOAD_WINDOW = parse_window(os.environ["LOAD_WINDOW"]) if os.environ.get("LOAD_WINDOW") else None
+
+TRAFFIC_DATA = scale_traffic_pattern(TRAFFIC_DATA, LOAD_MULTIPLIER, seed=LOAD_SEED, window=LOAD_WINDOW)
+
 # Load credentials JSON file
 CREDS_FILE = "credentials.json"
 
@@ -50,6 +63,13 @@ PROTECTED_URLS = [
     "/team/{id}/samples.zip"
 ]
 
+# Think time between a user's tasks, in seconds
+WAIT_TIME_RANGE = (1, 3)
+
+# Bytes of request line, headers and form fields around a submission's file,
+# roughly the received_bytes of a bodyless GET in the recorded logs
+REQUEST_OVERHEAD_BYTES = 600
+
 # Request headers
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
@@ -83,6 +103,19 @@ for time_slot, data in TRAFFIC_DATA.items():
     except Exception as e:
         print(f"Skipping invalid time interval {time_slot}: {e}")
 
+def find_current_bucket():
+    """Returns the HH:MM start of the bucket matching the current wall-clock time, or None."""
+    now = datetime.now()
+    current_bucket = None
+
+    # Find the current 5-minute interval (round down)
+    for bucket_time in sorted(time_buckets.keys()):
+        bucket_hour, bucket_minute = map(int, bucket_time.split(":"))
+        if now.hour == bucket_hour and now.minute >= bucket_minute:
+            current_bucket = bucket_time
+
+    return current_bucket
+
 ###############################################################################
 # STEP 2: CUSTOM LOAD SHAPE - ADJUST USERS PER 5-MIN INTERVAL
 ###############################################################################
@@ -93,14 +126,7 @@ class CustomLoadShape(LoadTestShape):
     """
 
     def tick(self):
-        current_time = datetime.now().strftime("%H:%M")  # Get current HH:MM
-        current_bucket = None
-
-        # Find the current 5-minute interval (round down)
-        for bucket_time in sorted(time_buckets.keys()):
-            bucket_hour, bucket_minute = map(int, bucket_time.split(":"))
-            if datetime.now().hour == bucket_hour and datetime.now().minute >= bucket_minute:
-                current_bucket = bucket_time
+        current_bucket = find_current_bucket()
 
         if not current_bucket:
             return None  # No valid bucket, stop test
@@ -112,9 +138,8 @@ class CustomLoadShape(LoadTestShape):
         if total_requests == 0:
             return None  # No protected URL requests in this bucket
 
-        # Use exactly as many users as needed based on request count
-        # Each user will make approximately one request in this time bucket
-        target_users = max(total_requests, 1)
+        # Enough users that, one request per task, the bucket sees the scaled request count
+        target_users = users_for_bucket(total_requests, sum(WAIT_TIME_RANGE) / 2)
         
         # Define spawn rate (how fast users are added)
         spawn_rate = max(target_users // 5, 1)  # Faster spawn rate to ensure all users are active
@@ -195,7 +220,8 @@ class DOMjudgeUser(HttpUser):
     Simulates user requests for protected endpoints based on the JSON traffic pattern.
     Handles PHP Session authentication properly.
     """
-    wait_time = between(1, 3)  # Random wait time
+    wait_time = between(*WAIT_TIME_RANGE)  # Random wait time
+    user_numbers = itertools.count()
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -203,9 +229,10 @@ class DOMjudgeUser(HttpUser):
         self.csrf_token = None
         self.cookies = {}
         
-        # Randomly select credentials for this user
+        # Hand out credentials round-robin so extra users at a higher load multiplier
+        # log in as separate teams instead of piling onto the same few accounts
         if CREDENTIALS.get("users"):
-            self.user_creds = random.choice(CREDENTIALS["users"])
+            self.user_creds = CREDENTIALS["users"][next(self.user_numbers) % len(CREDENTIALS["users"])]
         else:
             self.user_creds = {"username": "default", "password": "default"}
 
@@ -254,14 +281,8 @@ class DOMjudgeUser(HttpUser):
             if not self.is_authenticated:
                 return  # Skip if authentication failed
                 
-        current_time = datetime.now().strftime("%H:%M")
-
         # Find the active bucket
-        current_bucket = None
-        for bucket_time in sorted(time_buckets.keys()):
-            bucket_hour, bucket_minute = map(int, bucket_time.split(":"))
-            if datetime.now().hour == bucket_hour and datetime.now().minute >= bucket_minute:
-                current_bucket = bucket_time
+        current_bucket = find_current_bucket()
 
         if not current_bucket:
             return  # No valid bucket found
@@ -278,15 +299,13 @@ class DOMjudgeUser(HttpUser):
             return  # No protected URLs to request in this bucket
 
         # Pick a URL based on frequency
-        url_to_request = random.choice(request_choices)
+        template = random.choice(request_choices)
         
-        # Handle URL parameters
-        if "{id}" in url_to_request:
-            # Replace {id} with an actual ID (customize based on your needs)
-            url_to_request = url_to_request.replace("{id}", str(random.randint(1, 100)))
+        # Handle URL parameters with ids recorded for this template
+        url_to_request = fill_template_ids(template, bucket_data[template])
         
-        # Choose appropriate method based on URL
-        if "/team/submit" in url_to_request:
+        # Submit only for the recorded POST share; most hits on submit URLs are form loads
+        if "/team/submit" in url_to_request and random.random() < post_share(bucket_data[template]):
             self.submit_solution(url_to_request)
         else:
             try:
@@ -319,8 +338,12 @@ class DOMjudgeUser(HttpUser):
                 print(f"❌ CSRF Token not found for submission form!")
                 return
                 
-            # Simulated file content
+            # Simulated file content, padded to a recorded upload size
             file_content = f"print('Hello, World! Problem {problem_id}')" if language == "python" else "class Main { public static void main(String[] args) {} }"
+            payload_size = sample_payload_size(url) - REQUEST_OVERHEAD_BYTES
+            if payload_size > len(file_content):
+                comment = "#" if language == "python" else "//"
+                file_content += "\n" + comment + " " * (payload_size - len(file_content) - len(comment) - 1)
             
             # Submit solution with CSRF token
             submit_data = {
@@ -347,7 +370,114 @@ class DOMjudgeUser(HttpUser):
 
 
 ###############################################################################
-# STEP 5: RUN LOCUST WITH THIS CONFIGURATION
+# STEP 5: PAYLOAD SIZING AND BANDWIDTH TRACKING
+###############################################################################
+
+def post_share(url_data):
+    """
+    Fraction of the recorded requests to a URL that were POSTs, from the per-method size counts.
+
+    Patterns recorded without per-method counts return 1.0 (always submit), as before.
+    The form GET that precedes each replayed POST counts towards the GET share.
+    """
+    by_method = url_data.get("bytes_by_method", {})
+    counts = {method: byte_stats.get("received_bytes", {}).get("count", 0) for method, byte_stats in by_method.items()}
+    total = sum(counts.values())
+    return counts.get("POST", 0) / total if total else 1.0
+
+def post_size_stats(url_list, url):
+    return url_list.get(url, {}).get("bytes_by_method", {}).get("POST", {}).get("received_bytes")
+
+def sample_payload_size(url):
+    """
+    Draws a request size for url from the recorded POST received_bytes percentiles of the current bucket.
+
+    Only POSTs count: GET page loads of the submit form are far more frequent and would pull
+    the sizes down to a bodyless request. Interpolates linearly between the min/p50/p90/p99
+    points, so replayed uploads follow the recorded size distribution instead of a fixed
+    few-byte file. Returns 0 when nothing was recorded.
+    """
+    url_list = time_buckets.get(find_current_bucket(), {}).get("url_list", {})
+    size_stats = post_size_stats(url_list, url_template(url)) or post_size_stats(url_list, "/team/submit")
+    if not size_stats:
+        return 0
+
+    points = [(0.0, size_stats.get("min", size_stats["p50"])), (0.5, size_stats["p50"]), (0.9, size_stats["p90"]),
+              (0.99, size_stats["p99"]), (1.0, size_stats["p99"])]
+    q = random.random()
+    for (q_low, size_low), (q_high, size_high) in zip(points, points[1:]):
+        if q <= q_high:
+            return int(size_low + (size_high - size_low) * (q - q_low) / (q_high - q_low))
+    return size_stats["p99"]
+
+def recorded_mb_per_s(bucket_time, name):
+    """Recorded (and load-multiplied) MB/s of the protected URLs in a bucket."""
+    url_list = time_buckets.get(bucket_time, {}).get("url_list", {})
+    total = sum(url_data.get("bytes", {}).get(name, {}).get("total", 0) for url_data in url_list.values())
+    return total / INTERVAL_SECONDS / 1e6
+
+def headers_size(headers):
+    return sum(len(name) + len(value) + 4 for name, value in headers.items())
+
+def response_wire_bytes(response, response_length):
+    """
+    Body bytes as they crossed the wire, i.e. before requests decompresses them, to match
+    ALB sent_bytes. Uses Content-Length, else the raw stream position, else the decoded length.
+    """
+    content_length = response.headers.get("Content-Length")
+    if content_length and content_length.isdigit():
+        return int(content_length)
+    try:
+        return response.raw.tell()
+    except Exception:
+        return response_length or 0
+
+# Achieved bytes per bucket, named after the ALB fields they correspond to
+achieved_bytes = defaultdict(lambda: {"received_bytes": 0, "sent_bytes": 0, "first_seen": None, "last_seen": None})
+
+@events.request.add_listener
+def track_bandwidth(name, response_length, response=None, exception=None, **kwargs):
+    """
+    Accumulates bytes sent to and received from the target per bucket (login traffic excluded).
+    """
+    bucket_time = find_current_bucket()
+    if not bucket_time or name.startswith("/login") or response is None:
+        return
+
+    request = response.request
+    body = request.body or b""
+    request_bytes = len(f"{request.method} {request.path_url} HTTP/1.1\r\n") + headers_size(request.headers) + len(body)
+    response_bytes = headers_size(response.headers) + response_wire_bytes(response, response_length)
+
+    now = time.time()
+    bucket = achieved_bytes[bucket_time]
+    bucket["received_bytes"] += request_bytes
+    bucket["sent_bytes"] += response_bytes
+    bucket["first_seen"] = bucket["first_seen"] or now
+    bucket["last_seen"] = now
+
+@events.test_stop.add_listener
+def report_bandwidth(**kwargs):
+    """
+    Prints achieved versus recorded MB/s per bucket for both directions.
+
+    Achieved bytes are request/response line, headers and body as sent on the wire
+    (compressed response bodies, per Content-Length), the same quantity the ALB logs.
+    """
+    print("Bandwidth: achieved counts wire bytes incl. headers (compressed bodies via Content-Length); "
+          "recorded is ALB received_bytes/sent_bytes for protected URLs")
+    for bucket_time in sorted(achieved_bytes):
+        bucket = achieved_bytes[bucket_time]
+        elapsed = max(bucket["last_seen"] - bucket["first_seen"], 1)
+        for name in ("received_bytes", "sent_bytes"):
+            achieved = bucket[name] / elapsed / 1e6
+            recorded = recorded_mb_per_s(bucket_time, name)
+            ratio = f"{achieved / recorded:.0%}" if recorded else "n/a"
+            print(f"Bandwidth {bucket_time} {name}: achieved {achieved:.3f} MB/s, recorded {recorded:.3f} MB/s ({ratio})")
+
+
+###############################################################################
+# STEP 6: RUN LOCUST WITH THIS CONFIGURATION
 ###############################################################################
 
 # """